@@ -12,6 +12,13 @@ class Config:
     CHUNK_OVERLAP = int(os.getenv("CHUNK_OVERLAP", 50))
     TOP_K_DEFAULT = int(os.getenv("TOP_K_DEFAULT", 4))
     MAX_HISTORY_TURNS = int(os.getenv("MAX_HISTORY_TURNS", 5))
+    MAX_STORED_TURNS = int(os.getenv("MAX_STORED_TURNS", 50))
+    MONGO_INSERT_BATCH_SIZE = int(os.getenv("MONGO_INSERT_BATCH_SIZE", 1000))
+    EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", 100))
+    LOCAL_SEARCH_THRESHOLD = int(os.getenv("LOCAL_SEARCH_THRESHOLD", 5000))
+    CACHE_MAX_SIZE = int(os.getenv("CACHE_MAX_SIZE", 1024))
+    CACHE_TTL_SECONDS = int(os.getenv("CACHE_TTL_SECONDS", 300))
+    PDF_WORKERS = int(os.getenv("PDF_WORKERS", 2))
     EMBEDDING_MODEL = "text-embedding-3-small"
     LLM_MODEL = "gpt-3.5-turbo"
 
@@ -1,5 +1,6 @@
-from pymongo import MongoClient
-from typing import List, Optional, Dict, Any
+from pymongo import AsyncMongoClient, UpdateOne
+from pymongo.errors import ConnectionFailure, DuplicateKeyError, PyMongoError
+from typing import List, Optional, Dict, Any, AsyncIterator
 from datetime import datetime
 import uuid
 from .config import config
@@ -7,43 +8,88 @@ from .models import DocumentChunk, ConversationTurn, UserHistory, DocumentMetada
 
 class MongoDB:
     def __init__(self):
-        self.client = MongoClient(config.MONGODB_URL)
+        self.client = AsyncMongoClient(config.MONGODB_URL)
         self.db = self.client[config.DATABASE_NAME]
         self.documents = self.db.documents
         self.chunks = self.db.chunks
         self.conversations = self.db.conversations
+    
+    async def create_indexes(self):
+        """Create indexes for the lookups used below; failures are logged, not raised"""
+        indexes = [
+            (self.conversations, "user_id", True),
+            (self.chunks, "chunk_id", True),
+            (self.documents, "document_id", False)
+        ]
+        for collection, field, unique in indexes:
+            try:
+                await collection.create_index(field, unique=unique)
+            except DuplicateKeyError as e:
+                print(f"Skipping unique index on {collection.name}.{field}, existing data has duplicates: {e}")
+            except ConnectionFailure as e:
+                # Let the app start anyway; /health reports the database as unhealthy
+                print(f"Error creating indexes, database unreachable: {e}")
+                return
+            except PyMongoError as e:
+                print(f"Error creating index on {collection.name}.{field}: {e}")
         
     async def store_document_metadata(self, metadata: DocumentMetadata) -> str:
         """Store document metadata"""
-        result = self.documents.insert_one(metadata.dict())
+        result = await self.documents.insert_one(metadata.dict())
         return str(result.inserted_id)
     
     async def store_document_chunks(self, chunks: List[DocumentChunk]) -> List[str]:
         """Store document chunks"""
         chunk_dicts = [chunk.dict() for chunk in chunks]
-        result = self.chunks.insert_many(chunk_dicts)
-        return [str(id) for id in result.inserted_ids]
+        inserted_ids = []
+        batch_size = config.MONGO_INSERT_BATCH_SIZE
+        # Unordered inserts skip the per-document ordering barrier
+        for i in range(0, len(chunk_dicts), batch_size):
+            result = await self.chunks.insert_many(chunk_dicts[i:i + batch_size], ordered=False)
+            inserted_ids.extend(result.inserted_ids)
+        return [str(id) for id in inserted_ids]
+    
+    async def store_chunk_embeddings(self, chunks: List[DocumentChunk]):
+        """Save embeddings onto chunks that are already stored"""
+        operations = [
+            UpdateOne({"chunk_id": chunk.chunk_id}, {"$set": {"embedding": chunk.embedding}})
+            for chunk in chunks
+        ]
+        batch_size = config.MONGO_INSERT_BATCH_SIZE
+        for i in range(0, len(operations), batch_size):
+            await self.chunks.bulk_write(operations[i:i + batch_size], ordered=False)
     
     async def get_conversation_history(self, user_id: str, limit: int = None) -> List[ConversationTurn]:
         """Get user's conversation history"""
         if limit is None:
             limit = config.MAX_HISTORY_TURNS
             
-        history = self.conversations.find_one({"user_id": user_id})
-        if not history:
+        # Let MongoDB slice out the last 'limit' conversations
+        pipeline = [
+            {"$match": {"user_id": user_id}},
+            {"$project": {"_id": 0, "conversations": {"$slice": ["$conversations", -limit]}}}
+        ]
+        cursor = await self.conversations.aggregate(pipeline)
+        histories = await cursor.to_list(length=1)
+        if not histories:
             return []
         
-        conversations = history.get("conversations", [])
-        # Return last 'limit' conversations
-        return [ConversationTurn(**conv) for conv in conversations[-limit:]]
+        conversations = histories[0].get("conversations") or []
+        return [ConversationTurn(**conv) for conv in conversations]
     
     async def store_conversation_turn(self, user_id: str, turn: ConversationTurn) -> str:
         """Store a conversation turn"""
         # Update or create user conversation history
-        self.conversations.update_one(
+        await self.conversations.update_one(
             {"user_id": user_id},
             {
-                "$push": {"conversations": turn.dict()},
+                # Keep the array bounded so the document doesn't grow forever
+                "$push": {
+                    "conversations": {
+                        "$each": [turn.dict()],
+                        "$slice": -config.MAX_STORED_TURNS
+                    }
+                },
                 "$set": {"last_updated": datetime.utcnow()}
             },
             upsert=True
@@ -52,21 +98,53 @@ class MongoDB:
     
     async def get_documents_list(self) -> List[DocumentMetadata]:
         """Get list of all documents"""
-        docs = list(self.documents.find())
+        projection = {
+            "_id": 0,
+            "document_id": 1,
+            "filename": 1,
+            "file_type": 1,
+            "file_size": 1,
+            "upload_timestamp": 1,
+            "total_chunks": 1,
+            "total_pages": 1
+        }
+        docs = await self.documents.find({}, projection).to_list(length=None)
         return [DocumentMetadata(**doc) for doc in docs]
     
+    async def iter_chunk_batches(self, batch_size: int, missing_embeddings: bool = False) -> AsyncIterator[List[DocumentChunk]]:
+        """Stream stored chunks in batches, optionally only those without a saved embedding"""
+        query = {"embedding": None} if missing_embeddings else {}
+        projection = {
+            "_id": 0,
+            "chunk_id": 1,
+            "document_id": 1,
+            "filename": 1,
+            "chunk_text": 1,
+            "page_number": 1,
+            "upload_timestamp": 1,
+            "embedding": 1
+        }
+        batch = []
+        async for chunk in self.chunks.find(query, projection).batch_size(batch_size):
+            batch.append(DocumentChunk(**chunk))
+            if len(batch) == batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+    
     async def get_chunk_by_id(self, chunk_id: str) -> Optional[DocumentChunk]:
         """Get chunk by ID"""
-        chunk = self.chunks.find_one({"chunk_id": chunk_id})
+        chunk = await self.chunks.find_one({"chunk_id": chunk_id})
         if chunk:
             return DocumentChunk(**chunk)
         return None
     
     async def clear_all_data(self):
         """Clear all data from collections"""
-        self.documents.delete_many({})
-        self.chunks.delete_many({})
-        self.conversations.delete_many({})
+        await self.documents.delete_many({})
+        await self.chunks.delete_many({})
+        await self.conversations.delete_many({})
 
 # Global database instance
 db = MongoDB()
\ No newline at end of file
@@ -1,37 +1,69 @@
 import PyPDF2
 import tiktoken
 import uuid
-from typing import List, Tuple
+import re
+import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from bisect import bisect_right
+from functools import cached_property
+from itertools import accumulate
+from typing import List, Tuple, Sequence
 from datetime import datetime
 from io import BytesIO
 from .config import config
 from .models import DocumentChunk, DocumentMetadata
 
+# A sentence runs up to terminal punctuation followed by whitespace (so "3.14" stays whole)
+_SENTENCE_RE = re.compile(r'\S.*?(?:[.!?]+(?=\s|$)|$)', re.DOTALL)
+
+def _extract_pdf_bytes(file_content: bytes) -> Tuple[str, int]:
+    """Extract text from PDF bytes; top-level so it can run in a worker process"""
+    try:
+        pdf_reader = PyPDF2.PdfReader(BytesIO(file_content))
+        text_pages = [page.extract_text() for page in pdf_reader.pages]
+        
+        # Combine all text
+        full_text = "\n".join(text_pages)
+        total_pages = len(pdf_reader.pages)
+        
+        return full_text, total_pages
+    except Exception as e:
+        raise ValueError(f"Error processing PDF: {str(e)}")
+
+# PDF parsing is CPU-bound, so it runs outside the event loop and the GIL.
+# Workers are spawned rather than forked so they don't inherit the server's threads.
+_pool = None
+
+def _get_pool() -> ProcessPoolExecutor:
+    """Get the PDF worker pool, creating it on first use"""
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(
+            max_workers=config.PDF_WORKERS,
+            mp_context=multiprocessing.get_context("spawn")
+        )
+    return _pool
+
+async def _run_in_pool(func, *args):
+    """Run func in the worker pool, replacing the pool if a worker died"""
+    global _pool
+    pool = _get_pool()
+    try:
+        return await asyncio.get_running_loop().run_in_executor(pool, func, *args)
+    except BrokenProcessPool:
+        # e.g. a worker was OOM-killed; later uploads get a fresh pool
+        if _pool is pool:
+            _pool = None
+        pool.shutdown(wait=False)
+        raise
+
 class DocumentProcessor:
-    def __init__(self):
-        self.encoding = tiktoken.get_encoding("cl100k_base")  # GPT-3.5/4 encoding
-    
-    def count_tokens(self, text: str) -> int:
-        """Count tokens in text"""
-        return len(self.encoding.encode(text))
-    
-    def extract_text_from_pdf(self, file_content: bytes) -> Tuple[str, int]:
-        """Extract text from PDF file"""
-        try:
-            pdf_reader = PyPDF2.PdfReader(BytesIO(file_content))
-            text_pages = []
-            
-            for page_num, page in enumerate(pdf_reader.pages, 1):
-                text = page.extract_text()
-                text_pages.append((text, page_num))
-            
-            # Combine all text
-            full_text = "\n".join([page[0] for page in text_pages])
-            total_pages = len(pdf_reader.pages)
-            
-            return full_text, total_pages
-        except Exception as e:
-            raise ValueError(f"Error processing PDF: {str(e)}")
+    @cached_property
+    def encoding(self) -> tiktoken.Encoding:
+        """Tokenizer, loaded on first use so PDF workers don't pay for it"""
+        return tiktoken.get_encoding("cl100k_base")  # GPT-3.5/4 encoding
     
     def extract_text_from_txt(self, file_content: bytes) -> Tuple[str, int]:
         """Extract text from TXT file"""
@@ -52,69 +84,63 @@ class DocumentProcessor:
         overlap = config.CHUNK_OVERLAP
         
         # Split text into sentences for better chunking
-        sentences = text.split('.')
-        current_chunk = ""
-        current_tokens = 0
+        sentences = [match.group().strip() for match in _SENTENCE_RE.finditer(text)]
+        
+        # Encode every sentence exactly once and keep cumulative token counts
+        sentence_tokens = [self.encoding.encode(sentence) for sentence in sentences]
+        cumulative_tokens = list(accumulate((len(tokens) for tokens in sentence_tokens), initial=0))
+        
+        overlap_parts = []  # (text, tokens) pairs carried into the next chunk
+        start = 0
         chunk_index = 0
         
-        for sentence in sentences:
-            sentence = sentence.strip()
-            if not sentence:
-                continue
-                
-            sentence += "."  # Add back the period
-            sentence_tokens = self.count_tokens(sentence)
+        while start < len(sentences):
+            # Take as many sentences as fit after the overlap, but always at least one
+            budget = chunk_size - sum(len(tokens) for _, tokens in overlap_parts)
+            end = bisect_right(cumulative_tokens, cumulative_tokens[start] + budget) - 1
+            end = max(end, start + 1)
+            
+            current_parts = overlap_parts + list(zip(sentences[start:end], sentence_tokens[start:end]))
+            chunk_text = " ".join(text for text, _ in current_parts).strip()
             
-            # If adding this sentence would exceed chunk size, create a chunk
-            if current_tokens + sentence_tokens > chunk_size and current_chunk:
-                # Create chunk
-                chunk_id = f"{document_id}_chunk_{chunk_index}"
-                page_num = self._get_page_for_text(current_chunk, page_mapping) if page_mapping else None
-                
-                chunk = DocumentChunk(
-                    document_id=document_id,
-                    filename=filename,
-                    chunk_id=chunk_id,
-                    chunk_text=current_chunk.strip(),
-                    page_number=page_num,
-                    upload_timestamp=datetime.utcnow()
-                )
-                chunks.append(chunk)
-                
-                # Start new chunk with overlap
-                overlap_text = self._get_overlap_text(current_chunk, overlap)
-                current_chunk = overlap_text + " " + sentence
-                current_tokens = self.count_tokens(current_chunk)
-                chunk_index += 1
-            else:
-                current_chunk += " " + sentence
-                current_tokens += sentence_tokens
-        
-        # Add the last chunk if it has content
-        if current_chunk.strip():
             chunk_id = f"{document_id}_chunk_{chunk_index}"
-            page_num = self._get_page_for_text(current_chunk, page_mapping) if page_mapping else None
+            page_num = self._get_page_for_text(chunk_text, page_mapping) if page_mapping else None
             
             chunk = DocumentChunk(
                 document_id=document_id,
                 filename=filename,
                 chunk_id=chunk_id,
-                chunk_text=current_chunk.strip(),
+                chunk_text=chunk_text,
                 page_number=page_num,
                 upload_timestamp=datetime.utcnow()
             )
             chunks.append(chunk)
+            
+            # Carry the last 'overlap' tokens into the next chunk without re-encoding
+            if overlap > 0:
+                overlap_parts = self._get_overlap_parts(current_parts, overlap)
+            start = end
+            chunk_index += 1
         
         return chunks
     
-    def _get_overlap_text(self, text: str, overlap_tokens: int) -> str:
-        """Get the last 'overlap_tokens' worth of text"""
-        tokens = self.encoding.encode(text)
-        if len(tokens) <= overlap_tokens:
-            return text
+    def _get_overlap_parts(self, parts: List[Tuple[str, Sequence[int]]], overlap_tokens: int) -> List[Tuple[str, Sequence[int]]]:
+        """Get the trailing parts worth 'overlap_tokens' tokens, cutting the first one if needed"""
+        overlap_parts = []
+        remaining = overlap_tokens
+        
+        for text, tokens in reversed(parts):
+            if remaining <= 0:
+                break
+            if len(tokens) > remaining:
+                # Decode only this part's tail so sentences keep their separating spaces
+                tokens = tokens[-remaining:]
+                text = self.encoding.decode(list(tokens)).strip()
+            overlap_parts.append((text, tokens))
+            remaining -= len(tokens)
         
-        overlap_token_list = tokens[-overlap_tokens:]
-        return self.encoding.decode(overlap_token_list)
+        overlap_parts.reverse()
+        return overlap_parts
     
     def _get_page_for_text(self, text: str, page_mapping: dict) -> int:
         """Determine which page a chunk of text belongs to"""
@@ -130,7 +156,7 @@ class DocumentProcessor:
         
         # Extract text based on file type
         if file_type == 'pdf':
-            full_text, total_pages = self.extract_text_from_pdf(file_content)
+            full_text, total_pages = await _run_in_pool(_extract_pdf_bytes, file_content)
         elif file_type == 'txt':
             full_text, total_pages = self.extract_text_from_txt(file_content)
         else:
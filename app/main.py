@@ -2,11 +2,14 @@ from fastapi import FastAPI, File, UploadFile, HTTPException, Query
 from fastapi.responses import JSONResponse
 from typing import List, Optional
 import uuid
+import asyncio
 from .models import QuestionRequest, AnswerResponse, DocumentMetadata
 from .database import db
 from .vector_store import vector_store
 from .document_processor import doc_processor
 from .rag_chain import rag_chain
+from .openai_client import close_openai_client
+from .config import config
 
 app = FastAPI(
     title="Conversational RAG Q&A System",
@@ -14,6 +17,17 @@ app = FastAPI(
     version="1.0.0"
 )
 
+@app.on_event("startup")
+async def startup():
+    """Open the vector store and create database indexes on startup"""
+    vector_store.connect()
+    await db.create_indexes()
+
+@app.on_event("shutdown")
+async def shutdown():
+    """Close the shared OpenAI HTTP client"""
+    await close_openai_client()
+
 @app.post("/upload")
 async def upload_document(file: UploadFile = File(...)):
     """Upload and process a document (.pdf or .txt)"""
@@ -32,12 +46,14 @@ async def upload_document(file: UploadFile = File(...)):
         # Process document
         metadata, chunks = await doc_processor.process_document(file.filename, content)
         
-        # Store in MongoDB
-        await db.store_document_metadata(metadata)
-        await db.store_document_chunks(chunks)
+        # Store metadata while the chunks are embedded and added to the vector store
+        await asyncio.gather(
+            db.store_document_metadata(metadata),
+            vector_store.add_chunks(chunks)
+        )
         
-        # Add to vector store
-        await vector_store.add_chunks(chunks)
+        # Store chunks once they carry their embeddings
+        await db.store_document_chunks(chunks)
         
         return {
             "message": "Document uploaded successfully",
@@ -111,6 +127,31 @@ async def clear_system():
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error clearing system: {str(e)}")
 
+@app.post("/rebuild")
+async def rebuild_vector_store():
+    """Rebuild the vector store from chunks stored in MongoDB"""
+    
+    try:
+        batch_size = config.EMBEDDING_BATCH_SIZE
+        
+        # Embed older chunks first, saving each batch, so a failure here leaves the current index intact
+        async for chunks in db.iter_chunk_batches(batch_size, missing_embeddings=True):
+            await db.store_chunk_embeddings(await vector_store.embed_chunks(chunks))
+        
+        await vector_store.clear_collection()
+        total_chunks = 0
+        async for chunks in db.iter_chunk_batches(batch_size):
+            await vector_store.add_chunks(chunks)
+            total_chunks += len(chunks)
+        
+        return {
+            "message": "Vector store rebuilt successfully",
+            "total_chunks": total_chunks
+        }
+        
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error rebuilding vector store: {str(e)}")
+
 @app.get("/")
 async def root():
     """Root endpoint with API information"""
@@ -122,7 +163,8 @@ async def root():
             "/ask": "POST - Ask questions",
             "/history": "GET - Get conversation history",
             "/documents": "GET - List uploaded documents",
-            "/clear": "DELETE - Clear all data"
+            "/clear": "DELETE - Clear all data",
+            "/rebuild": "POST - Rebuild vector store from stored chunks"
         }
     }
 
@@ -10,6 +10,7 @@ class DocumentChunk(BaseModel):
     page_number: Optional[int] = None
     upload_timestamp: datetime
     metadata: Optional[Dict[str, Any]] = {}
+    embedding: Optional[bytes] = None  # packed float32 vector
 
 class QuestionRequest(BaseModel):
     user_id: str
@@ -0,0 +1,28 @@
+import httpx
+from openai import AsyncOpenAI
+from typing import Optional
+from .config import config
+
+# Global OpenAI client sharing one pooled HTTP/2 connection set, created on first use
+_client: Optional[AsyncOpenAI] = None
+
+def get_openai_client() -> AsyncOpenAI:
+    """Get the shared OpenAI client"""
+    global _client
+    if _client is None:
+        _client = AsyncOpenAI(
+            api_key=config.OPENAI_API_KEY,
+            http_client=httpx.AsyncClient(
+                http2=True,
+                timeout=30.0,
+                limits=httpx.Limits(max_keepalive_connections=32, max_connections=64)
+            )
+        )
+    return _client
+
+async def close_openai_client():
+    """Close the shared OpenAI client if it was created"""
+    global _client
+    if _client is not None:
+        await _client.close()
+        _client = None
\ No newline at end of file
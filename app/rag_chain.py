@@ -1,15 +1,39 @@
-import openai
+import re
 from typing import List, Tuple, Dict, Any
 from datetime import datetime
 from .config import config
+from .openai_client import get_openai_client
 from .models import ConversationTurn, Reference, AnswerResponse
 from .vector_store import vector_store
 from .database import db
 
+PROMPT_INSTRUCTIONS = """
+## Instructions:
+1. Answer the question based ONLY on the provided document context
+2. If the answer cannot be found in the documents, say so clearly
+3. Cite specific documents and pages when possible
+4. Provide reasoning for how you arrived at your answer
+5. Be concise but comprehensive
+6. Consider the conversation history for context
+
+Please provide your answer in the following format:
+ANSWER: [Your detailed answer here]
+REASONING: [Explain how you derived this answer from the documents]
+"""
+
+# Well-formed LLM output: "ANSWER: ... REASONING: ..."
+RESPONSE_RE = re.compile(r'\s*ANSWER:\s*(.*?)\s*REASONING:\s*(.*?)\s*$', re.DOTALL)
+
+# Common long words that make poor follow-up topics
+STOP_WORDS = frozenset({
+    "about", "above", "after", "again", "against", "among", "based", "because",
+    "before", "being", "below", "between", "could", "doing", "during", "every",
+    "further", "having", "might", "other", "should", "since", "their", "there",
+    "these", "those", "through", "under", "until", "where", "which", "while",
+    "would", "within", "without"
+})
+
 class RAGChain:
-    def __init__(self):
-        openai.api_key = config.OPENAI_API_KEY
-    
     def _build_context_prompt(self, 
                             question: str, 
                             history: List[ConversationTurn], 
@@ -21,9 +45,8 @@ class RAGChain:
         # Add conversation history if available
         if history:
             prompt_parts.append("\n## Previous Conversation:")
-            for turn in history[-3:]:  # Last 3 turns
-                prompt_parts.append(f"Q: {turn.question}")
-                prompt_parts.append(f"A: {turn.answer}")
+            # Last 3 turns
+            prompt_parts.extend(f"Q: {turn.question}\nA: {turn.answer}" for turn in history[-3:])
         
         # Add retrieved document context
         if retrieved_chunks:
@@ -31,24 +54,11 @@ class RAGChain:
             for i, (chunk_id, content, metadata, score) in enumerate(retrieved_chunks):
                 filename = metadata.get('filename', 'Unknown')
                 page_num = metadata.get('page_number', 'N/A')
-                prompt_parts.append(f"\n[Document {i+1}: {filename}, Page {page_num}]")
-                prompt_parts.append(f"{content}")
+                prompt_parts.append(f"\n[Document {i+1}: {filename}, Page {page_num}]\n{content}")
         
         prompt_parts.append(f"\n## Current Question:\n{question}")
         
-        prompt_parts.append("""
-## Instructions:
-1. Answer the question based ONLY on the provided document context
-2. If the answer cannot be found in the documents, say so clearly
-3. Cite specific documents and pages when possible
-4. Provide reasoning for how you arrived at your answer
-5. Be concise but comprehensive
-6. Consider the conversation history for context
-
-Please provide your answer in the following format:
-ANSWER: [Your detailed answer here]
-REASONING: [Explain how you derived this answer from the documents]
-""")
+        prompt_parts.append(PROMPT_INSTRUCTIONS)
         
         return "\n".join(prompt_parts)
     
@@ -56,12 +66,17 @@ REASONING: [Explain how you derived this answer from the documents]
         """Generate follow-up question suggestions"""
         suggestions = []
         
-        # Extract key topics from references
-        topics = set()
+        # Extract key topics from references (only 2 are used)
+        topics = []
         for ref in references:
             # Simple keyword extraction (could be improved with NLP)
-            words = ref.content_snippet.lower().split()
-            topics.update([word for word in words if len(word) > 4])
+            for word in ref.content_snippet.lower().split()[:40]:
+                if len(word) > 4 and word not in STOP_WORDS and word not in topics:
+                    topics.append(word)
+                    if len(topics) >= 2:
+                        break
+            if len(topics) >= 2:
+                break
         
         # Generate contextual suggestions based on the current question and topics
         if "what" in question.lower():
@@ -72,7 +87,7 @@ REASONING: [Explain how you derived this answer from the documents]
             suggestions.append(f"What happened before or after this?")
         
         # Add topic-specific suggestions
-        for topic in list(topics)[:2]:  # Limit to 2 topics
+        for topic in topics:
             suggestions.append(f"Tell me more about {topic}")
         
         return suggestions[:3]  # Return max 3 suggestions
@@ -124,7 +139,7 @@ REASONING: [Explain how you derived this answer from the documents]
         
         # 4. Call OpenAI LLM
         try:
-            response = openai.chat.completions.create(
+            response = await get_openai_client().chat.completions.create(
                 model=config.LLM_MODEL,
                 messages=[
                     {"role": "system", "content": "You are a helpful document analysis assistant."},
@@ -173,24 +188,26 @@ REASONING: [Explain how you derived this answer from the documents]
     
     def _parse_llm_response(self, response: str) -> Tuple[str, str]:
         """Parse the LLM response to extract answer and reasoning"""
-        answer = ""
-        reasoning = ""
-        
-        lines = response.split('\n')
-        current_section = None
-        
-        for line in lines:
-            line = line.strip()
-            if line.startswith("ANSWER:"):
-                current_section = "answer"
-                answer = line[7:].strip()
-            elif line.startswith("REASONING:"):
-                current_section = "reasoning"
-                reasoning = line[10:].strip()
-            elif current_section == "answer" and line:
-                answer += " " + line
-            elif current_section == "reasoning" and line:
-                reasoning += " " + line
+        match = RESPONSE_RE.match(response)
+        if match:
+            answer, reasoning = match.group(1), match.group(2)
+        else:
+            # Fall back to a line scan for loosely formatted responses
+            answer_parts = []
+            reasoning_parts = []
+            current_parts = None
+            
+            for line in response.split('\n'):
+                line = line.strip()
+                if line.startswith("ANSWER:"):
+                    current_parts = answer_parts = [line[7:].strip()]
+                elif line.startswith("REASONING:"):
+                    current_parts = reasoning_parts = [line[10:].strip()]
+                elif current_parts is not None and line:
+                    current_parts.append(line)
+            
+            answer = " ".join(answer_parts)
+            reasoning = " ".join(reasoning_parts)
         
         # Fallback if parsing fails
         if not answer and not reasoning:
@@ -1,42 +1,165 @@
 import chromadb
 from chromadb.config import Settings
 from typing import List, Tuple, Dict, Any
-import openai
 import numpy as np
+import hashlib
+from cachetools import TTLCache
 from .config import config
+from .openai_client import get_openai_client
 from .models import DocumentChunk
 
+# Rows dequantized per step in the brute-force search; keeps the float32 temporary small
+_SEARCH_BLOCK_ROWS = 128
+
+def _quantize(vectors: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Quantize float vectors to int8 with one float32 scale per vector"""
+    scales = np.max(np.abs(vectors), axis=-1, keepdims=True) / 127
+    scales = np.where(scales == 0, 1, scales).astype(np.float32)
+    return np.round(vectors / scales).astype(np.int8), scales
+
 class VectorStore:
     def __init__(self):
+        # Chroma is opened in connect(), so importing this module (e.g. in a PDF worker) has no side effects
+        self.client = None
+        self.collection = None
+        self._reset_local_index()
+        self._embedding_cache = TTLCache(maxsize=config.CACHE_MAX_SIZE, ttl=config.CACHE_TTL_SECONDS)
+        self._search_cache = TTLCache(maxsize=config.CACHE_MAX_SIZE, ttl=config.CACHE_TTL_SECONDS)
+    
+    def connect(self):
+        """Open the persistent collection and load the in-memory index, once"""
+        if self.collection is not None:
+            return
         self.client = chromadb.PersistentClient(path=config.CHROMA_PERSIST_DIRECTORY)
         self.collection = self.client.get_or_create_collection(
             name="document_chunks",
             metadata={"hnsw:space": "cosine"}
         )
-        openai.api_key = config.OPENAI_API_KEY
+        self._load_local_index()
+    
+    def _reset_local_index(self):
+        """Empty the in-memory index used for small collections"""
+        self._local_enabled = True
+        self._embeddings = None  # (N, D) int8, quantized from L2-normalized vectors
+        self._scales = None  # (N, 1) float32 per-vector scales
+        self._ids = []
+        self._docs = []
+        self._metas = []
+    
+    def _load_local_index(self):
+        """Mirror the collection in memory if it is small enough for brute-force search"""
+        self._reset_local_index()
+        if self.collection.count() > config.LOCAL_SEARCH_THRESHOLD:
+            self._local_enabled = False
+            return
+        
+        data = self.collection.get(include=["embeddings", "documents", "metadatas"])
+        if data["ids"]:
+            self._add_to_local_index(data["ids"], data["documents"], data["metadatas"], data["embeddings"])
+    
+    def _add_to_local_index(self, ids: List[str], docs: List[str], metas: List[Dict], embeddings: List[List[float]]):
+        """Append normalized embeddings to the in-memory index"""
+        if not self._local_enabled:
+            return
+        if len(self._ids) + len(ids) > config.LOCAL_SEARCH_THRESHOLD:
+            # Too large for brute force; let Chroma's HNSW index handle it
+            self._reset_local_index()
+            self._local_enabled = False
+            return
+        
+        vectors = np.asarray(embeddings, dtype=np.float32)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        vectors /= np.where(norms == 0, 1, norms)
+        quantized, scales = _quantize(vectors)
+        
+        if self._embeddings is None:
+            self._embeddings, self._scales = quantized, scales
+        else:
+            self._embeddings = np.vstack([self._embeddings, quantized])
+            self._scales = np.vstack([self._scales, scales])
+        self._ids.extend(ids)
+        self._docs.extend(docs)
+        self._metas.extend(metas)
+    
+    def _local_search(self, query_embedding: List[float], top_k: int) -> List[Tuple[str, str, Dict, float]]:
+        """Cosine similarity search over the in-memory index"""
+        if self._embeddings is None or top_k <= 0:
+            return []
+        
+        query = np.asarray(query_embedding, dtype=np.float32)
+        norm = np.linalg.norm(query)
+        if norm:
+            query /= norm
+        
+        # Dequantize in bounded row blocks so each product still goes through BLAS
+        scores = np.empty(len(self._embeddings), dtype=np.float32)
+        for i in range(0, len(self._embeddings), _SEARCH_BLOCK_ROWS):
+            block = self._embeddings[i:i + _SEARCH_BLOCK_ROWS].astype(np.float32)
+            scores[i:i + _SEARCH_BLOCK_ROWS] = block @ query
+        scores *= self._scales[:, 0]
+        k = min(top_k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        
+        ids, docs, metas = self._ids, self._docs, self._metas
+        return [(ids[i], docs[i], metas[i], score) for i, score in zip(top.tolist(), scores[top].tolist())]
         
     async def get_embedding(self, text: str) -> List[float]:
         """Get embedding from OpenAI"""
+        cache_key = hashlib.sha256(text.encode("utf-8")).hexdigest()
+        cached = self._embedding_cache.get(cache_key)
+        if cached is not None:
+            return cached
+        
         try:
-            response = openai.embeddings.create(
+            response = await get_openai_client().embeddings.create(
                 model=config.EMBEDDING_MODEL,
                 input=text
             )
-            return response.data[0].embedding
+            embedding = response.data[0].embedding
+            self._embedding_cache[cache_key] = embedding
+            return embedding
         except Exception as e:
             print(f"Error getting embedding: {e}")
             return []
     
+    async def get_embeddings(self, texts: List[str]) -> List[List[float]]:
+        """Get embeddings from OpenAI in batches"""
+        embeddings = []
+        batch_size = config.EMBEDDING_BATCH_SIZE
+        try:
+            for i in range(0, len(texts), batch_size):
+                response = await get_openai_client().embeddings.create(
+                    model=config.EMBEDDING_MODEL,
+                    input=texts[i:i + batch_size]
+                )
+                # The API returns embeddings in input order
+                embeddings.extend(d.embedding for d in response.data)
+            return embeddings
+        except Exception as e:
+            print(f"Error getting embeddings: {e}")
+            return []
+    
+    async def embed_chunks(self, chunks: List[DocumentChunk]) -> List[DocumentChunk]:
+        """Fill in embeddings for chunks that don't already carry one and return those chunks"""
+        missing = [chunk for chunk in chunks if chunk.embedding is None]
+        if missing:
+            new_embeddings = await self.get_embeddings([chunk.chunk_text for chunk in missing])
+            if len(new_embeddings) != len(missing):
+                raise RuntimeError("Failed to get embeddings for document chunks")
+            for chunk, embedding in zip(missing, new_embeddings):
+                chunk.embedding = np.asarray(embedding, dtype=np.float32).tobytes()
+        return missing
+    
     async def add_chunks(self, chunks: List[DocumentChunk]):
         """Add document chunks to vector store"""
+        self.connect()
         texts = [chunk.chunk_text for chunk in chunks]
         chunk_ids = [chunk.chunk_id for chunk in chunks]
         
-        # Get embeddings for all chunks
-        embeddings = []
-        for text in texts:
-            embedding = await self.get_embedding(text)
-            embeddings.append(embedding)
+        await self.embed_chunks(chunks)
+        
+        embeddings = [np.frombuffer(chunk.embedding, dtype=np.float32).tolist() for chunk in chunks]
         
         # Prepare metadata
         metadatas = []
@@ -56,40 +179,61 @@ class VectorStore:
             metadatas=metadatas,
             ids=chunk_ids
         )
+        self._add_to_local_index(chunk_ids, texts, metadatas, embeddings)
+        
+        # New chunks can change the results of any cached search
+        self._search_cache.clear()
     
     async def similarity_search(self, query: str, top_k: int = 4) -> List[Tuple[str, str, Dict, float]]:
         """Search for similar chunks"""
+        cache_key = (query.strip().lower(), top_k)
+        cached = self._search_cache.get(cache_key)
+        if cached is not None:
+            return cached
+        
+        self.connect()
         query_embedding = await self.get_embedding(query)
         
         if not query_embedding:
             return []
         
+        if self._local_enabled:
+            search_results = self._local_search(query_embedding, top_k)
+            self._search_cache[cache_key] = search_results
+            return search_results
+        
         results = self.collection.query(
             query_embeddings=[query_embedding],
             n_results=top_k,
             include=["documents", "metadatas", "distances"]
         )
         
+        # Convert distances to similarity scores (1 - distance for cosine)
+        scores = 1.0 - np.asarray(results["distances"][0])
+        
         # Format results
-        search_results = []
-        for i in range(len(results["ids"][0])):
-            chunk_id = results["ids"][0][i]
-            document = results["documents"][0][i]
-            metadata = results["metadatas"][0][i]
-            # Convert distance to similarity score (1 - distance for cosine)
-            similarity_score = 1 - results["distances"][0][i]
-            
-            search_results.append((chunk_id, document, metadata, similarity_score))
+        search_results = list(zip(
+            results["ids"][0],
+            results["documents"][0],
+            results["metadatas"][0],
+            scores.tolist()
+        ))
         
+        self._search_cache[cache_key] = search_results
         return search_results
     
     async def clear_collection(self):
         """Clear all vectors from collection"""
+        self.connect()
         # Delete and recreate collection
         self.client.delete_collection("document_chunks")
         self.collection = self.client.get_or_create_collection(
             name="document_chunks",
             metadata={"hnsw:space": "cosine"}
         )
+        self._reset_local_index()
+        self._embedding_cache.clear()
+        self._search_cache.clear()
+
 # Global vector store instance
 vector_store = VectorStore()
\ No newline at end of file
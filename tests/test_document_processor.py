@@ -0,0 +1,49 @@
+import re
+
+import pytest
+import tiktoken
+
+# Byte-level encoding so the tests don't need to download cl100k_base
+BYTE_ENCODING = tiktoken.Encoding(
+    name="bytes",
+    pat_str=r"\S+|\s+",
+    mergeable_ranks={bytes([i]): i for i in range(256)},
+    special_tokens={},
+)
+
+TEXT = "Alpha one. Beta two. Gamma three. Delta four. Eps five. Zeta six. Eta seven. Theta eight."
+
+
+@pytest.fixture
+def processor(monkeypatch):
+    monkeypatch.setattr(tiktoken, "get_encoding", lambda name: BYTE_ENCODING)
+    from app.config import config
+    from app.document_processor import DocumentProcessor
+
+    monkeypatch.setattr(config, "CHUNK_SIZE", 30)
+    monkeypatch.setattr(config, "CHUNK_OVERLAP", 15)
+    return DocumentProcessor()
+
+
+def test_chunk_text_keeps_spaces_between_sentences(processor):
+    chunks = processor.chunk_text(TEXT, "doc", "doc.txt")
+
+    assert len(chunks) > 2
+    for chunk in chunks:
+        assert not re.search(r"\.\S", chunk.chunk_text), chunk.chunk_text
+
+
+def test_chunk_text_overlap_repeats_tail_of_previous_chunk(processor):
+    chunks = processor.chunk_text(TEXT, "doc", "doc.txt")
+
+    assert chunks[0].chunk_text == "Alpha one. Beta two."
+    assert chunks[1].chunk_text.startswith("a one. Beta two. Gamma three.")
+    for previous, current in zip(chunks, chunks[1:]):
+        overlap = current.chunk_text.split(". ")[0]
+        assert overlap in previous.chunk_text
+
+
+def test_chunk_text_ids_are_sequential(processor):
+    chunks = processor.chunk_text(TEXT, "doc", "doc.txt")
+
+    assert [chunk.chunk_id for chunk in chunks] == [f"doc_chunk_{i}" for i in range(len(chunks))]
@@ -0,0 +1,58 @@
+import asyncio
+from datetime import datetime
+
+import pytest
+
+pytest.importorskip("chromadb")
+pytest.importorskip("fastapi")
+
+from fastapi import HTTPException
+
+from app import main
+from app.models import DocumentChunk
+
+
+def make_chunks(count):
+    return [
+        DocumentChunk(
+            document_id="doc",
+            filename="doc.txt",
+            chunk_id=f"doc_chunk_{i}",
+            chunk_text=f"chunk {i}",
+            upload_timestamp=datetime(2024, 1, 1),
+        )
+        for i in range(count)
+    ]
+
+
+def test_rebuild_saves_embeddings_per_batch_and_keeps_index_when_embedding_fails(monkeypatch):
+    batches = [make_chunks(2), make_chunks(2)]
+    saved = []
+    calls = []
+
+    async def iter_chunk_batches(batch_size, missing_embeddings=False):
+        for batch in batches:
+            yield batch
+
+    async def store_chunk_embeddings(chunks):
+        saved.append([chunk.embedding for chunk in chunks])
+
+    async def get_embeddings(texts):
+        calls.append(texts)
+        # The second batch fails, as if the embeddings API went down mid-rebuild
+        return [[1.0, 0.0]] * len(texts) if len(calls) == 1 else []
+
+    async def clear_collection():
+        raise AssertionError("collection cleared before embeddings were ready")
+
+    monkeypatch.setattr(main.db, "iter_chunk_batches", iter_chunk_batches)
+    monkeypatch.setattr(main.db, "store_chunk_embeddings", store_chunk_embeddings)
+    monkeypatch.setattr(main.vector_store, "get_embeddings", get_embeddings)
+    monkeypatch.setattr(main.vector_store, "clear_collection", clear_collection)
+
+    with pytest.raises(HTTPException):
+        asyncio.run(main.rebuild_vector_store())
+
+    # The first batch was saved before the second one failed
+    assert len(saved) == 1
+    assert all(embedding is not None for embedding in saved[0])
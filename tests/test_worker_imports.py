@@ -0,0 +1,32 @@
+import subprocess
+import sys
+import textwrap
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def test_worker_import_of_app_main_has_no_side_effects():
+    """Spawned PDF workers re-run app.main as __mp_main__; that must not open Chroma or load the tokenizer"""
+    pytest.importorskip("chromadb")
+    pytest.importorskip("fastapi")
+    script = textwrap.dedent("""
+        import runpy
+        import chromadb
+        import tiktoken
+
+        def fail(*args, **kwargs):
+            raise AssertionError("called while importing app.main")
+
+        chromadb.PersistentClient = fail
+        tiktoken.get_encoding = fail
+
+        # Same call multiprocessing.spawn makes for a server started with 'python -m app.main'
+        runpy.run_module("app.main", run_name="__mp_main__", alter_sys=True)
+    """)
+
+    result = subprocess.run([sys.executable, "-c", script], cwd=ROOT, capture_output=True, text=True)
+
+    assert result.returncode == 0, result.stderr